@@ -15,12 +15,16 @@ import os
 import platform
 import io
 import webbrowser
-import base64
 import uuid
 import shutil
+import shlex
+import subprocess
 import urllib
+import bisect
+import functools
 from shutil import which
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import scrolledtext
 from tkinter import ttk
 from tktooltip import ToolTip
@@ -30,6 +34,10 @@ from tkinterweb import HtmlFrame
 import cmarkgfm
 from cmarkgfm.cmark import Options as cmarkgfmOptions
 import yaml
+try:
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
 
 #-------------------------------------------
 # Constants
@@ -44,6 +52,10 @@ DEFAULT_BASE_PATH="{home}/.notepy"
 DEFAULT_GEOMETRY="800x600"
 DEFAULT_FONT_SIZE=20
 
+LARGE_NOTE_SIZE=15000
+RENDER_POLL_INTERVAL=10
+MARKDOWN_OPTIONS=cmarkgfmOptions.CMARK_OPT_HARDBREAKS
+
 DEFAULT_CSS="""
 table, th, td {
     border: 1px solid black;
@@ -68,6 +80,8 @@ p code {
 
 CONFIG_FILE = ".notepy.yml"
 
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 #-------------------------------------------
 # Shims
 #-------------------------------------------
@@ -96,15 +110,17 @@ waitstatus_to_exitcode = getattr(os, 'waitstatus_to_exitcode', shim_waitstatus_t
 # Persistence
 #-------------------------------------------
 
+QUOTE_TABLE = str.maketrans({
+    "<":"%3C", ">": "%3E", ":": "%3A", "\"": "%22",
+    "/": "%2F", "\\":"%5C", "|": "%7C", "?": "%3F",
+    "*": "%2A", "%": "%25"})
+
 def quote(value):
     """Quotes special characters that are not allowed in file names.
     
     Special characters are URL encoded.
     """
-    return value.translate(str.maketrans({
-        "<":"%3C", ">": "%3E", ":": "%3A", "\"": "%22",
-        "/": "%2F", "\\":"%5C", "|": "%7C", "?": "%3F",
-        "*": "%2A", "%": "%25"}))
+    return value.translate(QUOTE_TABLE)
 
 # pylint: disable-next=too-many-instance-attributes
 class Persistence:
@@ -118,9 +134,11 @@ class Persistence:
         self.__set_defaults()
         self.__load_config_file()
         self.__basepath = self.__basepath_template.format(home=Path.home())
+        self.__note_paths = {}
         self.__mkdir(self.__basepath)
         self.__css = self.__load_css()
         self.__migrate()
+        self.__notes = None
 
     def __migrate(self):
         if self.__version < 3:
@@ -186,7 +204,7 @@ class Persistence:
         if not os.path.isfile(filename):
             self.__save_config_file()
         with open(filename, 'rb') as config_file:
-            config = yaml.load(config_file, yaml.SafeLoader)
+            config = yaml.load(config_file, YamlLoader)
         self.__version=config.get('persistence_version', 0)
         self.__basepath_template = config.get('base_path', DEFAULT_BASE_PATH)
         self.__geometry = config.get('geometry', DEFAULT_GEOMETRY)
@@ -258,7 +276,11 @@ class Persistence:
         :return: Path of directory that conatins the nore.
         :rtype: str
         """
-        return os.path.join(self.__basepath, quote(name))
+        path = self.__note_paths.get(name)
+        if path is None:
+            path = os.path.join(self.__basepath, quote(name))
+            self.__note_paths[name] = path
+        return path
 
     def list_notes(self):
         """Returns a list of all notes.
@@ -266,13 +288,16 @@ class Persistence:
         :return: List of all notes.
         :rtype: list[str]
         """
-        notes = []
-        for name in os.listdir(self.__basepath):
-            display_name = urllib.parse.unquote(name)
-            notefile = self.__note_filename(display_name)
-            if os.path.isfile(notefile):
-                notes.append(display_name)
-        return notes
+        if self.__notes is None:
+            self.__notes = set()
+            with os.scandir(self.__basepath) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        display_name = urllib.parse.unquote(entry.name)
+                        notefile = self.__note_filename(display_name)
+                        if os.path.isfile(notefile):
+                            self.__notes.add(display_name)
+        return sorted(self.__notes)
 
     def read_note(self, name):
         """Returns the contents of a note.
@@ -285,25 +310,33 @@ class Persistence:
         :return: Contents of the note.
         :rtype: str
         """
-        filename = self.__note_filename(name)
-        if not os.path.isfile(filename):
+        try:
+            with open(self.__note_filename(name), "r", encoding='UTF-8', newline='') as note_file:
+                return note_file.read()
+        except FileNotFoundError:
             self.write_note(name, "")
-        with open(filename, "rb") as note_file:
-            data = note_file.read().decode("utf-8")
-        return data
+            return ""
 
     def write_note(self, name, text):
         """Writes the contents of a note to note file.
 
+        The note file is replaced atomically, so that it is never
+        left partially written.
+
         :param name: Name of the note.
         :type  name: str
         :param text: Contents of the note.
         :type  text: str
         """
-        self.__mkdir(self.note_path(name))
+        if self.__notes is None or name not in self.__notes:
+            self.__mkdir(self.note_path(name))
         filename = self.__note_filename(name)
-        with open(filename, "wb") as note_file:
-            note_file.write(text.encode("utf-8"))
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, "w", encoding='UTF-8', newline='') as note_file:
+            note_file.write(text)
+        os.replace(temp_filename, filename)
+        if self.__notes is not None:
+            self.__notes.add(name)
 
     def rename_note(self, oldname, newname):
         """Renames a note in the filesystem.
@@ -316,6 +349,9 @@ class Persistence:
         old_path = self.note_path(oldname)
         new_path = self.note_path(newname)
         os.rename(old_path, new_path)
+        if self.__notes is not None:
+            self.__notes.discard(oldname)
+            self.__notes.add(newname)
 
     def remove_note(self, name):
         """Removes a note (including all related files).
@@ -326,6 +362,8 @@ class Persistence:
         note_path = self.note_path(name)
         if os.path.isdir(note_path):
             shutil.rmtree(note_path)
+        if self.__notes is not None:
+            self.__notes.discard(name)
 
     def read_tags(self, name):
         """Reads all tags associated with a note.
@@ -376,8 +414,13 @@ class Persistence:
         filename = "screenshot_" + str(uuid.uuid4()) + ".png"
         full_filename = os.path.join(self.note_path(name), filename)
         if platform.system() != "Windows":
-            status = os.system(self.__screenshot_command.format(filename=full_filename))
-            exit_code = waitstatus_to_exitcode(status)
+            try:
+                args = [arg.format(filename=full_filename)
+                    for arg in shlex.split(self.__screenshot_command)]
+                exit_code = subprocess.run(args, check=False).returncode
+            except (OSError, ValueError) as ex:
+                print(f"error: failed to run screenshot command: {ex}")
+                exit_code = 1
         else:
             screenshot = ImageGrab.grab()
             screenshot.save(full_filename)
@@ -396,6 +439,7 @@ class Persistence:
 # Model
 #-------------------------------------------
 
+# pylint: disable-next=too-many-instance-attributes
 class Note:
     """Contains all business logic of a note.
 
@@ -416,7 +460,9 @@ class Note:
         self.__parent = parent
         self.__persistence = persistence
         self.__name = name
-        self.__contents = self.__persistence.read_note(self.__name) if isvalid else ""
+        self.__name_lower = name.lower()
+        self.__contents = None if isvalid else ""
+        self.__contents_lower = None if isvalid else ""
         self.__tags = self.__persistence.read_tags(self.__name) if isvalid else []
         self.isvalid = isvalid
 
@@ -424,6 +470,11 @@ class Note:
     def __repr__(self):
         return self.__name
 
+    def __load_contents(self):
+        if self.__contents is None:
+            self.__contents = self.__persistence.read_note(self.__name)
+            self.__contents_lower = self.__contents.lower()
+
     def name(self, value=None):
         """Reads or sets the name of a note.
 
@@ -434,11 +485,25 @@ class Note:
         :rtype: str
         """
         if self.isvalid and value is not None and value != self.__name:
-            self.__persistence.rename_note(self.__name, value)
+            oldname = self.__name
+            self.__persistence.rename_note(oldname, value)
             self.__name = value
+            self.__name_lower = value.lower()
+            self.__parent.note_renamed(oldname, value)
             self.__parent.note_changed()
         return self.__name
 
+    def sort_key(self):
+        """Returns the key used to sort notes by name.
+
+        Notes are sorted case insensitive. Names that only differ in case
+        are sorted case sensitive.
+
+        :return: Sort key of the note.
+        :rtype: tuple
+        """
+        return (self.__name_lower, self.__name)
+
     def contents(self, value=None):
         """Reads or writes the contents of a note.
 
@@ -448,9 +513,12 @@ class Note:
         :return: Contents of the note.
         :rtype: str
         """
-        if self.isvalid and value is not None:
+        if self.isvalid and value is not None and value != self.__contents:
             self.__persistence.write_note(self.__name, value)
             self.__contents = value
+            self.__contents_lower = value.lower()
+            self.__parent.note_contents_changed()
+        self.__load_contents()
         return self.__contents
 
     def tags(self, value=None):
@@ -462,7 +530,7 @@ class Note:
         :return: Tags of the note
         :rtype: str[]
         """
-        if self.isvalid and value is not None:
+        if self.isvalid and value is not None and value != self.__tags:
             self.__persistence.write_tags(self.__name, value)
             self.__tags = value
             self.__parent.note_changed()
@@ -471,10 +539,11 @@ class Note:
     def __matches_filter(self, note_filter):
         result = False
         if self.isvalid:
-            if note_filter.lower() in self.__name.lower():
-                result = True
-            elif note_filter.lower() in self.__contents.lower():
+            if not note_filter or note_filter in self.__name_lower:
                 result = True
+            else:
+                self.__load_contents()
+                result = note_filter in self.__contents_lower
         return result
 
     def __matches_tags(self, tags):
@@ -489,7 +558,10 @@ class Note:
     def matches(self, note_filter, tags):
         """"Returns True, when the notes name or content matches the filter.
 
-        :param note_filter: Filter to check the note against.
+        The filter is matched case-insensitive, therefore it must be
+        provided in lower case.
+
+        :param note_filter: Lower case filter to check the note against.
         :type  note_filter: str
         :param tags: Tags to check the note against.
         :type  tags: str[]
@@ -503,7 +575,7 @@ class Note:
         """Deletes the note and all related files."""
         self.isvalid = False
         self.__persistence.remove_note(self.__name)
-        self.__parent.note_changed()
+        self.__parent.note_deleted(self.__name)
 
     def screenshot(self):
         """Takes a screenshot and returns the filename.
@@ -530,6 +602,7 @@ class Note:
         """
         return self.__persistence.css()
 
+# pylint: disable-next=too-many-instance-attributes
 class NoteCollection:
     """Business logic of a collection of notes.
 
@@ -540,10 +613,14 @@ class NoteCollection:
     def __init__(self, persistence):
         self.__persistence = persistence
         self.notes = {}
+        self._version = 0
+        self._query_cache = (-1, "", [], [])
         note_names = self.__persistence.list_notes()
         for name in note_names:
             note = Note(self, self.__persistence, name)
             self.notes[name] = note
+        self._sorted_notes = sorted(self.notes.values(), key=Note.sort_key)
+        self._sort_keys = [note.sort_key() for note in self._sorted_notes]
         self.on_changed = lambda : None
         self.on_selection_changed = lambda : None
         self.invalid_note = Note(self, self.__persistence, "", isvalid=False)
@@ -557,11 +634,16 @@ class NoteCollection:
             name = f"Untitled {number}"
         return name
 
-    def _rebuild_index(self):
-        notes = {}
-        for note in self.notes.values():
-            notes[note.name()] = note
-        self.notes = notes
+    def _insert_sorted(self, note):
+        key = note.sort_key()
+        index = bisect.bisect(self._sort_keys, key)
+        self._sort_keys.insert(index, key)
+        self._sorted_notes.insert(index, note)
+
+    def _remove_sorted(self, key):
+        index = bisect.bisect_left(self._sort_keys, key)
+        del self._sort_keys[index]
+        del self._sorted_notes[index]
 
     def query(self, note_filter, tags):
         """Returns an ordered list of all notes that matches the filter.
@@ -575,24 +657,67 @@ class NoteCollection:
         :return: Ordered list toall notes that matches the filter.
         :rtype: list[Note]
         """
-        notes = []
-        for note in self.notes.values():
-            if note.matches(note_filter, tags):
-                notes.append(note)
-        notes.sort(key=lambda note: note.name())
-        return notes
+        note_filter = note_filter.lower()
+        version, cached_filter, cached_tags, cached_notes = self._query_cache
+        if version == self._version and cached_tags == tags and cached_filter in note_filter:
+            # every note matching the new filter also matches the cached one,
+            # since the new filter contains the cached one
+            if cached_filter == note_filter:
+                return list(cached_notes)
+            notes = [note for note in cached_notes if note.matches(note_filter, tags)]
+        else:
+            notes = [note for note in self._sorted_notes if note.matches(note_filter, tags)]
+        self._query_cache = (self._version, note_filter, list(tags), notes)
+        return list(notes)
 
     def add_new(self):
         """Adds a new note to the collection."""
         name = self._generate_name()
         note = Note(self, self.__persistence, name)
         self.notes[name] = note
+        self._insert_sorted(note)
+        self._version += 1
         self.select(name)
         self.on_changed()
 
     def note_changed(self):
         """Is called by notes only to inform about changes."""
-        self._rebuild_index()
+        self._version += 1
+        self.on_changed()
+
+    def note_renamed(self, oldname, newname):
+        """Is called by notes only to inform about a changed name.
+
+        :param oldname: Old name of the note.
+        :type  oldname: str
+        :param newname: New name of the note.
+        :type  newname: str
+        """
+        self._version += 1
+        note = self.notes.pop(oldname)
+        self.notes[newname] = note
+        self._remove_sorted((oldname.lower(), oldname))
+        self._insert_sorted(note)
+
+    def note_deleted(self, name):
+        """Is called by notes only to inform about their deletion.
+
+        :param name: Name of the deleted note.
+        :type  name: str
+        """
+        self._version += 1
+        note = self.notes.pop(name, None)
+        if note is not None:
+            self._remove_sorted(note.sort_key())
+        self.on_changed()
+
+    def note_contents_changed(self):
+        """Is called by notes only to inform about changed contents.
+
+        Invalidates the cached result of the last query,
+        since the contents may change which notes match a filter.
+        """
+        self._version += 1
         self.on_changed()
 
     def selected_note(self):
@@ -617,6 +742,33 @@ class NoteCollection:
         """Returns a list of all tags."""
         return self.__persistence.list_tags()
 
+#-------------------------------------------
+# Rendering
+#-------------------------------------------
+
+def render_markdown(contents):
+    """Renders the contents of a note to HTML.
+
+    The function does not access any tkinter objects,
+    so it is safe to call it from a worker thread.
+    Results of recent calls are cached, so that switching
+    back to a note does not render it again.
+    Blank contents are rendered to an empty page without using the cache.
+
+    :param contents: Markdown contents of the note.
+    :type  contents: str
+
+    :return: Rendered HTML.
+    :rtype: str
+    """
+    if not contents.strip():
+        return ""
+    return _render_markdown_cached(contents)
+
+@functools.lru_cache(maxsize=64)
+def _render_markdown_cached(contents):
+    return cmarkgfm.github_flavored_markdown_to_html(contents, MARKDOWN_OPTIONS)
+
 #-------------------------------------------
 # Widgets
 #-------------------------------------------
@@ -635,25 +787,45 @@ class Icons:
     """
     def __init__(self, master, font_size):
         _ = master
-        font_data = base64.b64decode(ICONFONT)
-        self.font = ImageFont.truetype(font=io.BytesIO(font_data), size=64)
-        self.app = self.__draw_text("\uefb6", color="white")
-        self.font = ImageFont.truetype(font=io.BytesIO(font_data), size=font_size)
-        self.new = self.__draw_text("\uefc2")
-        self.search = self.__draw_text("\uef7f")
-        self.screenshot = self.__draw_text("\ueecf")
-        self.save = self.__draw_text("\ueff6")
-        self.browse = self.__draw_text("\ueedb")
-        self.delete = self.__draw_text("\ueebb")
-        self.tag = self.__draw_text("\uef5a")
-
-    def __draw_text(self, value, color='black'):
-        left, top, right, bottom = self.font.getbbox(value)
-        box = (right - left, bottom - top)
-        image = Image.new(mode="RGBA", size=box)
-        draw = ImageDraw.Draw(im=image)
-        draw.text(xy=(0,0), text=value, fill=color, font=self.font, anchor="lt")
-        return ImageTk.PhotoImage(image=image)
+        app_font = ImageFont.truetype(font=io.BytesIO(ICONFONT_BYTES), size=64)
+        self.app = self.__draw_text("\uefb6", app_font, color="white")
+        self.font = ImageFont.truetype(font=io.BytesIO(ICONFONT_BYTES), size=font_size)
+        glyphs = ("\uefc2", "\uef7f", "\ueecf", "\ueff6", "\ueedb", "\ueebb", "\uef5a")
+        boxes = [Icons.__box(glyph, self.font) for glyph in glyphs]
+        scratch = Image.new(mode="RGBA",
+            size=(max(box[0] for box in boxes), max(box[1] for box in boxes)))
+        self.new, self.search, self.screenshot, self.save, self.browse, self.delete, self.tag = [
+            self.__draw_text(glyph, self.font, scratch=scratch) for glyph in glyphs]
+
+    @staticmethod
+    def __box(value, font):
+        left, top, right, bottom = font.getbbox(value)
+        return (right - left, bottom - top)
+
+    def __draw_text(self, value, font, color='black', scratch=None):
+        box = Icons.__box(value, font)
+        if scratch is None:
+            scratch = Image.new(mode="RGBA", size=box)
+        else:
+            scratch.paste((0, 0, 0, 0), (0, 0) + scratch.size)
+        draw = ImageDraw.Draw(im=scratch)
+        draw.text(xy=(0,0), text=value, fill=color, font=font, anchor="lt")
+        return ImageTk.PhotoImage(image=scratch.crop((0, 0) + box))
+
+def lazy_tooltip(widget, msg):
+    """
+    Adds a tooltip to a widget.
+    The tooltip is created when the mouse enters the widget for the first time.
+
+    :param widget: widget that shows the tooltip
+    :type  widget: tk.Widget
+    :param msg: message of the tooltip
+    :type  msg: str
+    """
+    def on_enter(event):
+        widget.unbind("<Enter>", funcid)
+        ToolTip(widget, msg=msg, delay=1.0).on_enter(event)
+    funcid = widget.bind("<Enter>", on_enter, add="+")
 
 def float_layout_apply(frame):
     """
@@ -730,6 +902,8 @@ class FilterableListbox(ttk.Frame):
     def __init__(self, master, model, icons):
         ttk.Frame.__init__(self, master)
         self.model = model
+        self.__names = None
+        self.__update_pending = False
         self.pack()
         self.__create_widgets(icons)
         self.model.on_changed = self.update
@@ -738,20 +912,21 @@ class FilterableListbox(ttk.Frame):
         self.commandframe = ttk.Frame(self)
         self.new_button = ttk.Button(self.commandframe, image=icons.new, command=self.model.add_new)
         self.new_button.pack(side = tk.RIGHT, fill=tk.X)
-        ToolTip(self.new_button, msg="add new note (Ctrl+N)", delay=1.0)
+        lazy_tooltip(self.new_button, "add new note (Ctrl+N)")
         self.label = ttk.Label(self.commandframe, image=icons.search)
         self.label.pack(side=tk.RIGHT, fill=tk.X)
         self.filter = tk.StringVar()
-        self.filter.trace("w", lambda *args: self.update() )
+        self.filter.trace_add("write", self.__schedule_update)
         self.entry = ttk.Entry(self.commandframe, textvariable=self.filter)
         self.entry.pack(fill=tk.X, expand=True, padx=5)
-        ToolTip(self.entry, msg="filter notes (Ctrl+F)", delay=1.0)
+        lazy_tooltip(self.entry, "filter notes (Ctrl+F)")
         self.commandframe.pack(side = tk.TOP, fill=tk.X)
 
         self.tagbox = ttk.Frame(self)
         float_layout_apply(self.tagbox)
 
-        self.listbox = tk.Listbox(self)
+        self.listvar = tk.Variable(self)
+        self.listbox = tk.Listbox(self, listvariable=self.listvar)
         self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.scrollbar=ttk.Scrollbar(self)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -784,22 +959,30 @@ class FilterableListbox(ttk.Frame):
             self.tagbox.event_generate("<Configure>", when="tail")
 
 
+    def __schedule_update(self, *_):
+        if not self.__update_pending:
+            self.__update_pending = True
+            self.after_idle(self.__run_scheduled_update)
+
+    def __run_scheduled_update(self):
+        self.__update_pending = False
+        self.update()
+
     def update(self):
         """Updates the displayed list of notes."""
         note_filter = self.filter.get()
         tags = self.__get_active_tags()
-        self.listbox.delete(0, tk.END)
         items = self.model.query(note_filter, tags)
         selected = self.model.selected_note().name()
-        i = 0
-        selected_index = -1
-        for item in items:
-            self.listbox.insert(tk.END, item)
-            if selected == item.name():
-                selected_index = i
-            i += 1
-        if selected_index >= 0:
-            self.listbox.select_set(selected_index)
+        names = [item.name() for item in items]
+        if names != self.__names:
+            self.listvar.set(tuple(names))
+            self.__names = names
+        self.listbox.select_clear(0, tk.END)
+        try:
+            self.listbox.select_set(names.index(selected))
+        except ValueError:
+            pass
         self.__update_tags()
 
     def onselect(self, event):
@@ -910,10 +1093,15 @@ class NoteFrame(ttk.Frame):
         self.model = model
         self.columnconfigure(0, weight=1)
         self.rowconfigure(0, weight=1)
+        self.__render_pool = ThreadPoolExecutor(max_workers=1)
+        self.__pending_render = None
+        self.__view_outdated = False
+        self.__loaded_page = None
         self.__create_widgets(icons)
         model.on_selection_changed = self.update
-        first_note = list(self.model.notes.keys())[0] if len(self.model.notes) > 0 else None
-        self.model.select(first_note)
+        notes = self.model.query("", [])
+        first_note = notes[0].name() if len(notes) > 0 else None
+        self.after_idle(lambda: self.model.select(first_note))
 
     def __create_widgets(self, icons):
         self.notebook = TabControl(self)
@@ -921,29 +1109,29 @@ class NoteFrame(ttk.Frame):
 
         self.frame = HtmlFrame(self.notebook, messages_enabled=False)
         self.frame.on_link_click(self.link_clicked)
-        self.frame.load_html("")
+        self.__load_html("")
         self.notebook.add(self.frame, 'View')
 
         editframe = tk.Frame(self.notebook)
         commandframe = ttk.Frame(editframe)
         deletebutton = ttk.Button(commandframe, image=icons.delete, command = self.delete)
         deletebutton.pack(side=tk.RIGHT)
-        ToolTip(deletebutton, msg="delete this note (Ctrl+D)", delay=1.0)
+        lazy_tooltip(deletebutton, "delete this note (Ctrl+D)")
         updatebutton = ttk.Button(commandframe, image=icons.save, command = self.save)
         updatebutton.pack(side=tk.RIGHT)
-        ToolTip(updatebutton, msg="sync changes (Ctrl+S)", delay=1.0)
+        lazy_tooltip(updatebutton, "sync changes (Ctrl+S)")
         browsebutton = ttk.Button(commandframe, image=icons.browse, \
             command = self.browse_attachments)
         browsebutton.pack(side=tk.RIGHT)
-        ToolTip(browsebutton, msg="browse attachments (Ctrl+B)", delay=1.0)
+        lazy_tooltip(browsebutton, "browse attachments (Ctrl+B)")
         screenshotbutton = ttk.Button(commandframe, image=icons.screenshot, \
             command = self.screenshot)
         screenshotbutton.pack(side=tk.RIGHT, padx=5)
-        ToolTip(screenshotbutton, msg="take screenshot (Ctrl+P)", delay=1.0)
+        lazy_tooltip(screenshotbutton, "take screenshot (Ctrl+P)")
         self.namevar = tk.StringVar()
         nameedit = tk.Entry(commandframe, textvariable=self.namevar)
         nameedit.pack(fill=tk.BOTH, expand=True)
-        ToolTip(nameedit, msg="change title", delay=1.0)
+        lazy_tooltip(nameedit, "change title")
 
         commandframe.pack(fill=tk.X, side=tk.TOP)
 
@@ -964,6 +1152,12 @@ class NoteFrame(ttk.Frame):
 
         self.notebook.bind("<<TabControlTabChanged>>", self.tab_changed)
 
+    def destroy(self):
+        """Stops the background renderer and destroys the widget."""
+        self.__cancel_render()
+        self.__render_pool.shutdown(wait=False)
+        ttk.Frame.destroy(self)
+
     def browse_attachments(self):
         """Opens a note's attachments in file explorer."""
         if self.note is not None:
@@ -972,7 +1166,11 @@ class NoteFrame(ttk.Frame):
                 # pylint: disable-next=no-member
                 os.startfile(path)
             else:
-                os.system(f"xdg-open '{path}'")
+                try:
+                    subprocess.run(["xdg-open", path], check=False)
+                except OSError:
+                    tk.messagebox.showerror(title=APP_NAME, \
+                        message="Failed to open attachments.\nCheck that xdg-open is installed.")
 
     def enable(self, value=True):
         """Enables or disables all activatable sub-widgets.
@@ -983,41 +1181,122 @@ class NoteFrame(ttk.Frame):
         for widget in self.activateable_widgets:
             widget.configure(state="normal" if value is True else "disabled")
 
-    def __update_view(self):
-        """Updates the view of a note."""
-        contents = self.text.get(1.0, tk.END)
-        html = cmarkgfm.github_flavored_markdown_to_html(contents,
-        (cmarkgfmOptions.CMARK_OPT_HARDBREAKS))
-        self.frame.load_html(html, base_url=f"file://{self.note.base_path()}/")
-        self.frame.add_css(self.note.css())
+    def __cancel_render(self):
+        """Cancels a pending background render of the view."""
+        if self.__pending_render is not None:
+            self.__pending_render.cancel()
+            self.__pending_render = None
+
+    def __update_view(self, contents=None):
+        """Updates the view of a note.
+
+        Large notes are rendered in background, so that a placeholder
+        is shown while the note is rendered.
+        While the view is hidden, it is only marked as outdated
+        and updated once it is shown.
+
+        :param contents: Optional contents of the editor, if already read (Default: None).
+        :type  contents: str | None
+        """
+        self.__cancel_render()
+        if self.notebook.index(self.notebook.select()) != 0:
+            self.__view_outdated = True
+            return
+        self.__view_outdated = False
+        if contents is None:
+            contents = self.text.get(1.0, tk.END)
+        if len(contents) > LARGE_NOTE_SIZE:
+            self.__pending_render = self.__render_pool.submit(render_markdown, contents)
+            self.after(RENDER_POLL_INTERVAL, self.__poll_render, self.__pending_render)
+        else:
+            self.__load_view(render_markdown(contents))
+
+    def __poll_render(self, future, loading=False):
+        """Loads the result of a background render into the view, once it is available.
+
+        The placeholder is only shown if the render is not done by the first poll,
+        so that cached results are shown without flickering.
+        Results of outdated renders are dropped.
+        """
+        if future is not self.__pending_render:
+            return
+        if not future.done():
+            if not loading:
+                self.__load_html("<p>Loading…</p>")
+            self.after(RENDER_POLL_INTERVAL, self.__poll_render, future, True)
+            return
+        self.__pending_render = None
+        self.__load_view(future.result())
+
+    def __load_view(self, html):
+        """Loads rendered contents of a note into the view."""
+        self.__load_html(html, f"file://{self.note.base_path()}/", self.note.css())
+
+    def __load_html(self, html, base_url=None, css=None):
+        """Loads a page into the view, unless the same page is already loaded.
+
+        :param html: HTML to load.
+        :type  html: str
+        :param base_url: Optional base URL of the page (Default: None).
+        :type  base_url: str | None
+        :param css: Optional style sheet of the page (Default: None).
+        :type  css: str | None
+        """
+        page = (html, base_url, css)
+        if page == self.__loaded_page:
+            return
+        self.__loaded_page = page
+        self.frame.load_html(html, base_url=base_url)
+        if css is not None:
+            self.frame.add_css(css)
 
     def update(self):
-        """Update the selected note (e.g. a new note is selected)."""
+        """Update the selected note (e.g. a new note is selected).
+
+        Nothing is reloaded, when the displayed note is selected again.
+        """
         self.save()
-        self.note = self.model.selected_note()
+        note = self.model.selected_note()
+        if note is self.note and note.isvalid:
+            return
+        self.note = note
         if self.note.isvalid:
             self.enable(True)
-            contents = self.note.contents()
-            self.text.delete(1.0, tk.END)
-            self.text.insert(tk.END, contents)
+            self.text.replace(1.0, tk.END, self.note.contents())
+            self.text.edit_modified(False)
             self.namevar.set(self.note.name())
             self.tagsvar.set(' '.join(self.note.tags()))
             self.__update_view()
         else:
-            self.frame.load_html("")
+            self.__cancel_render()
+            self.__view_outdated = False
+            self.__load_html("")
             self.namevar.set("")
             self.tagsvar.set("")
             self.text.delete(1.0, tk.END)
+            self.text.edit_modified(False)
             self.enable(False)
 
     def save(self):
-        """Saves the name and contents of a note."""
+        """Saves the name and contents of a note.
+
+        The view is only updated, when the name or the contents changed.
+        """
         if self.note is not None and self.note.isvalid:
-            contents = self.text.get(1.0, tk.END)
-            self.note.contents(contents)
-            self.note.name(self.namevar.get())
+            changed = False
+            contents = None
+            if self.text.edit_modified():
+                contents = self.text.get(1.0, tk.END)
+                self.note.contents(contents)
+                self.text.edit_modified(False)
+                changed = True
+            name = self.namevar.get()
+            if name != self.note.name():
+                self.note.name(name)
+                changed = True
             self.note.tags(self.tagsvar.get().split())
-            self.__update_view()
+            if changed:
+                self.__update_view(contents)
 
     def delete(self):
         """Asks, if the current note should be deleted and deletes it."""
@@ -1052,6 +1331,8 @@ class NoteFrame(ttk.Frame):
         tab = self.notebook.index(self.notebook.select())
         if tab == 0:
             self.save()
+            if self.__view_outdated:
+                self.__update_view()
 
     def change_tab(self, _):
         """Changes from view to edit tab or vice versa. Bound to Control-e."""
@@ -1064,10 +1345,12 @@ class NoteFrame(ttk.Frame):
 class App:
     """Main class that runs the app.
 
-    :param model: Model of the application.
-    :type model: AppModel
+    :param persistence: Optional persistence of the application (Default: None).
+    :type  persistence: Persistence | None
     """
-    def __init__(self, persistence = Persistence()):
+    def __init__(self, persistence = None):
+        if persistence is None:
+            persistence = Persistence()
         self.__persistence = persistence
         notes = NoteCollection(persistence)
         self.root = ThemedTk(theme=persistence.theme(), className=APP_NAME)
@@ -1189,6 +1472,8 @@ ICONFONT = (
     "bGlwBWxhYmVsAAAAAAH//wACAAAAAQAAAADeBipuAAAAAOBFzJUAAAAA4EXM"
     "lQ==")
 
+ICONFONT_BYTES = b64decode(ICONFONT)
+
 def main():
     """Entry point."""
     app = App()
@@ -15,6 +15,15 @@ class FakeNoteCollection:
     def note_changed(self):
         pass
 
+    def note_renamed(self, oldname, newname):
+        pass
+
+    def note_deleted(self, name):
+        pass
+
+    def note_contents_changed(self):
+        pass
+
 class FakePersistence:
     def __init__(self):
         pass
@@ -87,3 +96,40 @@ def test_matches_tag():
     n.tags(["foo"])
     assert(n.matches("", ["foo"]))
     assert(not n.matches("", ["bar"]))
+
+def test_matches_contents():
+    collection = FakeNoteCollection()
+    persistence = FakePersistence()
+    n = note.Note(collection, persistence, "test")
+    n.contents("Brummni")
+    assert(n.matches("brummni", []))
+    assert(not n.matches("foo", []))
+
+def test_load_contents_on_demand():
+    collection = FakeNoteCollection()
+    persistence = FakePersistence()
+    persistence.read_note = lambda name: "brummni"
+    n = note.Note(collection, persistence, "test")
+    persistence.read_note = lambda name: "changed"
+    assert("changed" == n.contents())
+
+def test_set_same_contents():
+    collection = FakeNoteCollection()
+    persistence = FakePersistence()
+    writes = []
+    persistence.write_note = lambda name, contents: writes.append(contents)
+    n = note.Note(collection, persistence, "test")
+    n.contents("brummni")
+    n.contents("brummni")
+    assert(["brummni"] == writes)
+
+def test_set_same_tags():
+    collection = FakeNoteCollection()
+    persistence = FakePersistence()
+    writes = []
+    persistence.write_tags = lambda name, tags: writes.append(tags)
+    n = note.Note(collection, persistence, "test")
+    n.tags([])
+    n.tags(["foo"])
+    n.tags(["foo"])
+    assert([["foo"]] == writes)
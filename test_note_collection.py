@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023 note.py authors
+#
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import random
+import tracemalloc
+import note
+
+class FakePersistence:
+    def __init__(self, notes=None):
+        self.notes = dict(notes) if notes is not None else {}
+
+    def list_notes(self):
+        return list(self.notes.keys())
+
+    def read_note(self, name):
+        return self.notes.setdefault(name, "")
+
+    def write_note(self, name, contents):
+        self.notes[name] = contents
+
+    def read_tags(self, name):
+        return []
+
+    def write_tags(self, name, tags):
+        pass
+
+    def rename_note(self, old_name, new_name):
+        self.notes[new_name] = self.notes.pop(old_name)
+
+    def remove_note(self, name):
+        self.notes.pop(name, None)
+
+    def list_tags(self):
+        return []
+
+def names(notes):
+    return [n.name() for n in notes]
+
+def test_query_all():
+    collection = note.NoteCollection(FakePersistence({"b": "", "a": ""}))
+    assert(["a", "b"] == names(collection.query("", [])))
+
+def test_query_sorted_case_insensitive():
+    collection = note.NoteCollection(FakePersistence({"b": "", "C": "", "a": "", "A": ""}))
+    assert(["A", "a", "b", "C"] == names(collection.query("", [])))
+
+def test_query_name():
+    collection = note.NoteCollection(FakePersistence({"Shopping": "", "Todo": ""}))
+    assert(["Shopping"] == names(collection.query("shop", [])))
+    assert(["Todo"] == names(collection.query("Do", [])))
+
+def test_query_contents():
+    collection = note.NoteCollection(FakePersistence({"a": "Brummni", "b": "foo"}))
+    assert(["a"] == names(collection.query("umm", [])))
+    assert([] == names(collection.query("bar", [])))
+
+def test_query_changed_contents():
+    collection = note.NoteCollection(FakePersistence({"a": "Brummni"}))
+    collection.notes["a"].contents("foobar")
+    assert([] == names(collection.query("brumm", [])))
+    assert(["a"] == names(collection.query("oba", [])))
+
+def test_query_renamed_note():
+    collection = note.NoteCollection(FakePersistence({"a": ""}))
+    collection.notes["a"].name("Shopping")
+    assert(["Shopping"] == names(collection.query("shopping", [])))
+
+def test_query_deleted_note():
+    collection = note.NoteCollection(FakePersistence({"Shopping": ""}))
+    collection.notes["Shopping"].delete()
+    assert([] == names(collection.query("shopping", [])))
+
+def test_query_memory():
+    rand = random.Random(42)
+    words = ["".join(rand.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rand.randint(2, 10)))
+        for _ in range(5000)]
+    notes = {f"note {i}": " ".join(rand.choice(words) for _ in range(4000)) for i in range(100)}
+    text_size = sum(len(contents) for contents in notes.values())
+    persistence = FakePersistence(notes)
+
+    tracemalloc.start()
+    try:
+        collection = note.NoteCollection(persistence)
+        collection.query("xyzw", [])
+        collection.query(words[0], [])
+        collection.notes["note 0"].contents("changed")
+        collection.query(words[1], [])
+        used, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # besides the notes, only a lower case copy of each note's contents is kept
+    assert(used < 1.5 * text_size)
+
+def test_rename_note():
+    collection = note.NoteCollection(FakePersistence({"a": "", "b": ""}))
+    collection.notes["a"].name("c")
+    assert(["b", "c"] == sorted(collection.notes.keys()))
+    assert("c" == collection.notes["c"].name())
+
+def test_query_sorted_after_rename():
+    collection = note.NoteCollection(FakePersistence({"a": "", "b": "", "c": ""}))
+    collection.notes["a"].name("d")
+    assert(["b", "c", "d"] == names(collection.query("", [])))
+    collection.notes["c"].name("A")
+    assert(["A", "b", "d"] == names(collection.query("", [])))
+
+def test_query_sorted_after_add():
+    collection = note.NoteCollection(FakePersistence({"a": "", "z": ""}))
+    collection.add_new()
+    assert(["a", "Untitled", "z"] == names(collection.query("", [])))
+
+def test_delete_note():
+    collection = note.NoteCollection(FakePersistence({"a": "", "b": ""}))
+    collection.notes["a"].delete()
+    assert(["b"] == list(collection.notes.keys()))
+    assert(["b"] == names(collection.query("", [])))
+
+def test_query_narrowed_filter():
+    collection = note.NoteCollection(FakePersistence({"Shopping": "", "Shoes": "", "Todo": ""}))
+    assert(["Shoes", "Shopping"] == names(collection.query("sho", [])))
+    assert(["Shopping"] == names(collection.query("shop", [])))
+    assert(["Shoes", "Shopping"] == names(collection.query("sho", [])))
+
+def test_query_after_change():
+    collection = note.NoteCollection(FakePersistence({"a": "Brummni", "b": ""}))
+    assert(["a"] == names(collection.query("brumm", [])))
+    collection.notes["b"].contents("brummni")
+    assert(["a", "b"] == names(collection.query("brumm", [])))
+
+def test_changed_contents_notifies():
+    collection = note.NoteCollection(FakePersistence({"a": "foo", "b": ""}))
+    results = []
+    collection.on_changed = lambda: results.append(names(collection.query("foo", [])))
+    assert(["a"] == names(collection.query("foo", [])))
+    collection.notes["a"].contents("bar")
+    collection.notes["b"].contents("foo")
+    assert([[], ["b"]] == results)
@@ -494,3 +494,77 @@ def test_migrate_from_v2_with_note_names_notes():
     assert "notes" in notes
     assert persistence.read_note("notes") == contents
     assert len(persistence.read_tags("notes")) == 0
+
+
+def test_keep_line_endings():
+    """Checks that line endings of notes are kept as is."""
+
+    config_file = fs.write_configfile()
+    persistence = Persistence(config_file)
+    title = "line-endings"
+    contents = "unix\nwindows\r\nmac\r"
+    persistence.write_note(title, contents)
+
+    assert Persistence(config_file).read_note(title) == contents
+    assert fs.read_file(os.path.join("base", title, "README.md")) == contents
+
+
+def test_read_missing_note():
+    """Checks that reading a missing note creates an empty note."""
+
+    config_file = fs.write_configfile()
+    persistence = Persistence(config_file)
+    title = "missing"
+
+    assert persistence.read_note(title) == ""
+    assert fs.read_file(os.path.join("base", title, "README.md")) == ""
+
+
+@pytest.mark.skipif(os.name=='nt', reason="Don't run on windows")
+def test_screenshot():
+    """Checks if a screenshot is stored in the note directory."""
+
+    config_file = fs.write_configfile(screenshot_command="touch \"{filename}\"")
+    persistence = Persistence(config_file)
+    title = "some note"
+    persistence.write_note(title, "")
+
+    filename = persistence.screenshot(title)
+    assert filename is not None
+    assert fs.is_file(os.path.join("base", title, filename))
+
+
+@pytest.mark.skipif(os.name=='nt', reason="Don't run on windows")
+def test_screenshot_failed():
+    """Checks that a failed screenshot is reported."""
+
+    config_file = fs.write_configfile(screenshot_command="false")
+    persistence = Persistence(config_file)
+    title = "some note"
+    persistence.write_note(title, "")
+
+    assert persistence.screenshot(title) is None
+
+
+@pytest.mark.skipif(os.name=='nt', reason="Don't run on windows")
+def test_screenshot_missing_command():
+    """Checks that a missing screenshot command is reported as failed screenshot."""
+
+    config_file = fs.write_configfile(screenshot_command="non-existing-screenshot-tool \"{filename}\"")
+    persistence = Persistence(config_file)
+    title = "some note"
+    persistence.write_note(title, "")
+
+    assert persistence.screenshot(title) is None
+
+
+@pytest.mark.skipif(os.name=='nt', reason="Don't run on windows")
+def test_screenshot_invalid_command():
+    """Checks that a screenshot command with unbalanced quotes is reported as failed screenshot."""
+
+    config_file = fs.write_configfile(screenshot_command="touch \"{filename}")
+    persistence = Persistence(config_file)
+    title = "some note"
+    persistence.write_note(title, "")
+
+    assert persistence.screenshot(title) is None